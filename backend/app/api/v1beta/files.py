@@ -1,6 +1,5 @@
-import json
 import logging
-import uuid
+import os
 
 from app.core import manager
 from app.core.config import settings
@@ -31,6 +30,9 @@ from fastapi.responses import FileResponse
 router = APIRouter(tags=["Files"])
 files_upload_router = APIRouter(tags=["Files"])
 
+# 代理上传 URL 的公共前缀只在启动时拼接一次；去掉末尾斜杠，避免配置带 / 时出现双斜杠
+_UPLOAD_URL_PREFIX = f"{settings.PROXY_BASE_URL.rstrip('/')}/upload/v1beta/files/"
+
 # ============================================================================
 # 可续传上传端点
 # ============================================================================
@@ -49,7 +51,7 @@ async def create_file(
     """
     Initializes a resumable upload session for a file. Returns a proxy upload URL for subsequent chunk uploads.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"文件上传初始化 | {body.file.display_name  or "Unknown"}")
 
     # 验证上传协议头
@@ -80,7 +82,7 @@ async def create_file(
         proxy_session_id = file_manager.create_upload_session(upload_url, body)
 
         # 生成代理上传 URL
-        proxy_upload_url = f"{settings.PROXY_BASE_URL}/upload/v1beta/files/{proxy_session_id}:upload"
+        proxy_upload_url = f"{_UPLOAD_URL_PREFIX}{proxy_session_id}:upload"
 
         # 返回响应
         response = Response(
@@ -107,7 +109,7 @@ async def update_file(
     """
     Uploads data chunks for a resumable upload session.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"文件块上传 | 会话: {session_id[:8]} | {content_length} bytes")
 
     # 验证会话
@@ -132,7 +134,7 @@ async def update_file(
 
     # 生成一次性下载令牌
     token = file_manager.generate_chunk_download_token(chunk_path)
-    chunk_download_url = f"{settings.PROXY_BASE_URL}/upload/v1beta/files/internal/{token}:download"
+    chunk_download_url = f"{_UPLOAD_URL_PREFIX}internal/{token}:download"
 
     try:
         # 向前端代理请求
@@ -181,11 +183,16 @@ async def get_file_chunk(token: str):
     Gets a temporary file chunk for upload to the frontend.
     """
     chunk_path = file_manager.consume_chunk_download_token(token)
-    if not chunk_path or not chunk_path.exists():
+    # 只 stat 一次：既判断文件是否存在，又把结果交给 FileResponse，避免其发送前再次 stat
+    try:
+        chunk_stat = chunk_path.stat() if chunk_path else None
+    except FileNotFoundError:
+        chunk_stat = None
+    if chunk_stat is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chunk not found or token invalid.")
 
     Logger.event("CHUNK_DOWNLOAD", "发送临时文件块给浏览器", token=token[:8])
-    return FileResponse(chunk_path, media_type="application/octet-stream")
+    return FileResponse(chunk_path, media_type="application/octet-stream", stat_result=chunk_stat)
 
 
 # ============================================================================
@@ -203,7 +210,7 @@ async def list_files(params: ListFilesPayload = Depends()):
     """
     Lists the metadata for Files owned by the requesting project.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"列出文件 | 页大小: {params.page_size}")
 
     files_response = file_manager.list_files(params.page_size, params.page_token)
@@ -222,7 +229,7 @@ async def get_file(request: Request, name: str):
     """
     Gets the metadata for the given File.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"获取文件 | {name}")
 
     async with manager.monitored_proxy_request(request_id, request):
@@ -249,7 +256,7 @@ async def delete_file(request: Request, name: str):
     """
     Deletes the File.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"删除文件 | {name}")
 
     try:
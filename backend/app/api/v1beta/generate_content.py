@@ -1,11 +1,11 @@
 import logging
-import uuid
+import os
 from typing import Annotated
 
 from app.core import manager
 from app.core.log_utils import Logger
 from app.schemas import GenerateContentPayload, GenerateContentResponse
-from fastapi import Path, Request
+from fastapi import Path, Request, Response
 from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
 
@@ -26,18 +26,20 @@ async def generate_content(
     """
     Generates a model response given an input GenerateContentRequest. Refer to the text generation guide for detailed usage information. Input capabilities differ between models, including tuned models. Refer to the model guide and tuning guide for details.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"生成内容 | {model}")
     async with manager.monitored_proxy_request(request_id, request):
         response_data = await manager.proxy_request(
             command_type="generateContent",
-            payload={"model": model, "payload": payload.model_dump(by_alias=True, exclude_none=True)},
+            payload={"model": model, "payload": payload},  # 模型在编码命令时直接序列化为 JSON
             request=request,
             request_id=request_id,
             is_streaming=False,
         )
+    # 一次校验后直接序列化为 JSON 字节，跳过 FastAPI 的 response_model 二次校验和 json.dumps
+    generated = GenerateContentResponse.model_validate(response_data)
     Logger.api_response(request_id, "生成完成")
-    return response_data
+    return Response(content=generated.model_dump_json(by_alias=True, exclude_none=True), media_type="application/json")
 
 
 @router.post(
@@ -53,7 +55,7 @@ async def stream_generate_content(
     """
     Generates a streamed response from the model given an input GenerateContentRequest.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"流式生成 | {model}")
 
     async def generator():
@@ -61,7 +63,7 @@ async def stream_generate_content(
             async with manager.monitored_proxy_request(request_id, request):
                 response_generator = await manager.proxy_request(
                     command_type="streamGenerateContent",
-                    payload={"model": model, "payload": payload.model_dump(by_alias=True, exclude_none=True)},
+                    payload={"model": model, "payload": payload},  # 模型在编码命令时直接序列化为 JSON
                     request=request,
                     request_id=request_id,
                     is_streaming=True,
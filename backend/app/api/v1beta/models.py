@@ -1,10 +1,10 @@
 import logging
-import uuid
+import os
 
 from app.core import manager
 from app.core.log_utils import Logger
 from app.schemas import ListModelsPayload, ListModelsResponse, Model
-from fastapi import Depends, Request
+from fastapi import Depends, Request, Response
 from fastapi.routing import APIRouter
 
 router = APIRouter(tags=["Models"])
@@ -20,14 +20,16 @@ async def list_models(request: Request, params: ListModelsPayload = Depends()):
     """
     Lists the Models available through the Gemini API.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, "列出模型")
     async with manager.monitored_proxy_request(request_id, request):
         response_data = await manager.proxy_request(
-            request=request, request_id=request_id, command_type="listModels", payload=params.model_dump(by_alias=True, exclude_none=True)
+            request=request, request_id=request_id, command_type="listModels", payload=params
         )
-    Logger.api_response(request_id, f"{len(response_data.get('models', []))} 个模型")
-    return response_data
+    # 一次校验后直接序列化为 JSON 字节，跳过 FastAPI 的 response_model 二次校验和 json.dumps
+    models = ListModelsResponse.model_validate(response_data)
+    Logger.api_response(request_id, f"{len(models.models or [])} 个模型")
+    return Response(content=models.model_dump_json(by_alias=True, exclude_none=True), media_type="application/json")
 
 
 @router.get(
@@ -40,12 +42,13 @@ async def get_model(request: Request, model: str):
     """
     Gets information about a specific Model such as its version number, token limits, parameters and other metadata.
     """
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
     Logger.api_request(request_id, f"获取模型 | {model}")
     command_payload = {"model": model}
     async with manager.monitored_proxy_request(request_id, request):
         response_data = await manager.proxy_request(
             request=request, request_id=request_id, command_type="getModel", payload=command_payload
         )
+    model_info = Model.model_validate(response_data)
     Logger.api_response(request_id, f"模型: {model}")
-    return response_data
+    return Response(content=model_info.model_dump_json(by_alias=True, exclude_none=True), media_type="application/json")
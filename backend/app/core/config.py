@@ -33,6 +33,7 @@ class Settings(BaseSettings):
     # WebSocket 配置
     # ===========================
     WEBSOCKET_TIMEOUT: int = 600  # WebSocket 请求超时时间（秒）
+    WS_STREAM_MAX_QUEUE: int = 64  # 单个流式请求最多缓存的未消费数据块数量，超出时取消该请求并以错误中止响应
 
     # ===========================
     # CORS 配置
@@ -71,6 +72,14 @@ class Settings(BaseSettings):
             raise ValueError(f"APP_ENV 必须是 {valid_envs} 之一")
         return v_lower
 
+    @field_validator("WS_STREAM_MAX_QUEUE")
+    @classmethod
+    def validate_stream_max_queue(cls, v: int) -> int:
+        """验证流式队列容量"""
+        if v < 1:
+            raise ValueError("WS_STREAM_MAX_QUEUE 必须为正整数")
+        return v
+
     @field_validator("TEMP_CHUNKS_DIR")
     @classmethod
     def validate_temp_dir(cls, v: str) -> str:
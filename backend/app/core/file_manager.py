@@ -4,7 +4,6 @@
 """
 
 import asyncio
-import json
 import logging
 import re
 import secrets
@@ -15,6 +14,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+import orjson
 from app.core.config import settings
 from app.core.log_utils import Logger
 from app.schemas.gemini_files import File as FileMetadata
@@ -185,8 +185,7 @@ class FileManager:
         except Exception as e:
             Logger.error("保存文件块失败", exc=e, chunk_path=str(chunk_path), session_id=proxy_session_id)
             # 清理失败的文件
-            if chunk_path.exists():
-                chunk_path.unlink()
+            chunk_path.unlink(missing_ok=True)
             raise IOError(f"Failed to save file chunk: {str(e)}")
 
     def process_upload_response(self, proxy_session_id: str, response_payload: dict[str, Any]) -> dict[str, Any]:
@@ -198,7 +197,7 @@ class FileManager:
 
         Returns:
             处理后的响应数据（包含 status, headers, content, is_final）
-            content 已序列化为字符串，可直接用于 HTTP 响应
+            content 已序列化（JSON 为 UTF-8 字节，其余为字符串），可直接用于 HTTP 响应
         """
         response_status = response_payload.get("status", 200)
         response_headers = response_payload.get("headers", {})
@@ -218,7 +217,7 @@ class FileManager:
             Logger.event("UPLOAD_COMPLETE", "文件上传完成", file=file_metadata.name, session_id=proxy_session_id)
 
         # 序列化响应内容
-        content = json.dumps(response_body) if isinstance(response_body, dict) else str(response_body)
+        content = orjson.dumps(response_body) if isinstance(response_body, dict) else str(response_body)
 
         return {"status": response_status, "headers": response_headers, "content": content, "is_final": is_final_chunk}
 
@@ -352,8 +351,7 @@ class FileManager:
             # 删除所有临时文件块
             for chunk_path in session.temp_chunks:
                 try:
-                    if chunk_path.exists():
-                        chunk_path.unlink()
+                    chunk_path.unlink(missing_ok=True)  # 直接删除，省去额外的 exists() 检查
                 except OSError as e:
                     Logger.error("删除临时文件块失败", exc=e, chunk_path=str(chunk_path), session_id=proxy_session_id)
 
@@ -366,6 +364,8 @@ class FileManager:
         """
         while True:
             await asyncio.sleep(settings.SESSION_CLEANUP_INTERVAL)
+            if not self.upload_sessions:
+                continue  # 没有上传会话时直接进入下一轮休眠
 
             now = datetime.now()
             expiration_threshold = timedelta(seconds=settings.SESSION_EXPIRATION_TIME)
@@ -3,7 +3,11 @@
 提供简洁、一致的日志接口，适合小型项目
 """
 
+import atexit
+import copy
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 from rich.logging import RichHandler
 
@@ -11,14 +15,35 @@ from rich.logging import RichHandler
 # 日志系统配置
 # ============================================================================
 
+# 后台日志线程：RichHandler 的格式化和终端输出都在该线程中完成，不阻塞事件循环
+_log_listener: QueueListener | None = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    同进程内使用的队列处理器
+
+    默认的 prepare 会为跨进程 pickle 预先格式化消息并丢弃 exc_info，
+    这里只合并消息参数，保留 exc_info 供 RichHandler 渲染异常栈。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 def setup_logging(log_level: str = "INFO"):
     """
     配置统一的日志系统
 
+    日志记录先写入内存队列，由后台线程交给 RichHandler 输出。
+
     Args:
         log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR)
     """
+    global _log_listener
 
     # 过滤 ping/pong 噪音日志
     class PingPongFilter(logging.Filter):
@@ -30,21 +55,36 @@ def setup_logging(log_level: str = "INFO"):
     handler = RichHandler(rich_tracebacks=True, markup=True, log_time_format="[%Y-%m-%d %H:%M:%S]")
     handler.addFilter(PingPongFilter())
 
+    # 重复调用时先停止旧的后台线程，保证已入队的日志输出完毕
+    if _log_listener is not None:
+        _log_listener.stop()
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, handler)
+    _log_listener.start()
+    queue_handler = _LocalQueueHandler(log_queue)
+
     # 配置根日志记录器
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     root_logger.handlers.clear()  # 清除现有处理器
-    root_logger.addHandler(handler)
+    root_logger.addHandler(queue_handler)
 
     # 同步 uvicorn 日志级别
     for logger_name in ["uvicorn.error", "uvicorn.access"]:
         logger = logging.getLogger(logger_name)
         logger.handlers.clear()
-        logger.addHandler(handler)
+        logger.addHandler(queue_handler)
         logger.setLevel(log_level)
         logger.propagate = False
 
 
+@atexit.register
+def _stop_log_listener():
+    """进程退出时停止后台日志线程，输出队列中剩余的日志（包括 uvicorn 的关闭日志）"""
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
 # ============================================================================
 # 统一日志接口
 # ============================================================================
@@ -181,9 +221,15 @@ class Logger:
         logging.info(message)
 
     @staticmethod
-    def debug(message: str):
-        """调试日志"""
-        logging.debug(message)
+    def debug(message: str, *args):
+        """
+        调试日志
+
+        Args:
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在 DEBUG 级别启用时才会格式化
+        """
+        logging.debug(message, *args)
 
     @staticmethod
     def warning(message: str, **context):
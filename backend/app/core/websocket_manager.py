@@ -1,59 +1,152 @@
 import asyncio
 import logging
+from collections import deque
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Any
 
+import orjson
 from app.core.config import settings
 from app.core.exceptions import ApiException
 from app.core.log_utils import Logger
 from fastapi import HTTPException, Request, WebSocket, status
 from pydantic import BaseModel
 
+# 固定控制帧的前缀只编码一次，发送时只需拼接请求 ID
+_CANCEL_FRAME_PREFIX = '{"type":"cancel_task","id":'
+
+
+def _embed_model_json(obj: Any) -> "orjson.Fragment":
+    """orjson 的 default 回调：Pydantic 模型直接由 pydantic-core 输出 JSON 并原样嵌入"""
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.model_dump_json(by_alias=True, exclude_none=True))
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ClientWriter:
+    """
+    单个客户端的发送协程
+
+    调用方只把预先编码好的帧放入队列并立即返回，由唯一的后台任务按顺序写入 socket，
+    避免多个协程并发等待同一个 WebSocket 的发送。
+    发送时队列中积压的多条消息会合并为一个 JSON 数组帧，前端需同时支持对象帧和数组帧。
+    """
+
+    def __init__(self, websocket: WebSocket, client_id: str) -> None:
+        self.client_id = client_id
+        self._websocket = websocket
+        self._frames: deque[str] = deque()
+        self._wakeup = asyncio.Event()
+        self.closed = False  # 发送任务退出后为 True，之后的帧直接丢弃
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, frame: str):
+        """将帧放入发送队列（不等待实际发送）；发送任务已退出时丢弃"""
+        if self.closed:
+            return
+        self._frames.append(frame)
+        self._wakeup.set()
+
+    def close(self):
+        """停止发送任务，丢弃尚未发送的帧"""
+        self.closed = True
+        self._task.cancel()
+        self._frames.clear()
+
+    async def _run(self):
+        frames = self._frames
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while frames:
+                    if len(frames) == 1:
+                        frame = frames.popleft()
+                    else:
+                        # 合并积压的消息：低负载时逐条发送，突发时自动批量，减少帧数和系统调用
+                        frame = "[" + ",".join(frames) + "]"
+                        frames.clear()
+                    try:
+                        await self._websocket.send_text(frame)
+                    except Exception as e:
+                        Logger.error("发送消息失败，关闭连接", exc=e, client_id=self.client_id)
+                        # 关闭连接，让接收循环退出并走统一的 disconnect 清理流程
+                        try:
+                            await self._websocket.close()
+                        except Exception:
+                            pass
+                        return
+        finally:
+            # 无论正常取消还是发送失败，退出后都不再接收新帧，避免队列无限增长
+            self.closed = True
+            frames.clear()
+
+
+@dataclass(slots=True)
+class PendingRequest:
+    """
+    单个进行中请求的全部状态
+
+    所属客户端、非流式的 Future、流式的队列和包计数放在同一个对象中，
+    处理每条消息时只需一次字典查找。
+    """
+
+    client_id: str
+    future: asyncio.Future | None = None  # 非流式请求等待响应的 Future
+    queue: asyncio.Queue | None = None  # 流式请求的数据块队列
+    chunk_count: int = 0  # 已收到的流式包数量（用于日志优化）
+
 
 class ConnectionManager:
     def __init__(self) -> None:
         self.active_connections: dict[str, WebSocket] = {}
-        self.pending_responses: dict[str, asyncio.Future] = {}
-        self.streaming_responses: dict[str, asyncio.Queue] = {}
+        self.client_writers: dict[str, ClientWriter] = {}
 
-        # 新增：追踪 request_id 到 client_id 的映射
-        self.request_to_client: dict[str, str] = {}
+        # 追踪所有进行中的请求：request_id -> 请求状态
+        self.requests: dict[str, PendingRequest] = {}
 
         # 新增：追踪每个 client 正在处理的请求集合
         self.client_active_requests: dict[str, set[str]] = {}
 
-        # 新增：追踪流式请求的包计数（用于日志优化）
-        self.streaming_chunk_count: dict[str, int] = {}
-
-        self._client_ids: list[str] = []
+        # 轮询用的客户端ID快照，仅在连接/断开时重建
+        self._client_ids: tuple[str, ...] = ()
         self._next_client_index: int = 0
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
+        if client_id in self.active_connections:
+            # 同一 client_id 重新连接：旧连接上的请求不会再收到响应，先清理，并停止旧的发送协程。
+            # 旧连接的 disconnect 随后发现连接已被替换，不会再动新连接的状态
+            self._release_client(client_id)
         self.active_connections[client_id] = websocket
-        self._client_ids.append(client_id)
+        self._client_ids = tuple(self.active_connections)
         self.client_active_requests[client_id] = set()
+        self.client_writers[client_id] = ClientWriter(websocket, client_id)
 
-    async def disconnect(self, client_id: str):
+    async def disconnect(self, client_id: str, websocket: WebSocket):
         """断开客户端连接，清理所有活跃请求"""
-        # 清理该客户端的所有活跃请求
-        if client_id in self.client_active_requests:
-            request_ids = list(self.client_active_requests[client_id])
+        if self.active_connections.get(client_id) is not websocket:
+            # 该 client_id 已由新连接接管，旧连接的资源在 connect 时已清理
+            return
+        self._release_client(client_id)
+        del self.active_connections[client_id]
+        self._client_ids = tuple(self.active_connections)
+
+    def _release_client(self, client_id: str):
+        """清理客户端当前连接上的所有活跃请求并停止其发送协程（内部方法）"""
+        # 先整体取出请求集合：清理时无需再逐个从集合中移除，也无需复制一份用于遍历
+        request_ids = self.client_active_requests.pop(client_id, None)
+        if request_ids is not None:
             Logger.event("DISCONNECT", f"取消 {len(request_ids)} 个请求", client_id=client_id)
 
-            # 使用 cancel_request 统一清理
+            # 该客户端的连接已失效，只清理后端资源，不再逐个发送取消信号
             for request_id in request_ids:
-                await self.cancel_request(request_id)
-
-            # 确保客户端条目被删除
-            self.client_active_requests.pop(client_id, None)
+                self._cleanup_request(request_id)
 
-        # 清理连接
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-        if client_id in self._client_ids:
-            self._client_ids.remove(client_id)
+        writer = self.client_writers.pop(client_id, None)
+        if writer is not None:
+            writer.close()
 
     async def handle_message(self, message: dict[str, Any]):
         """处理从前端收到的响应消息"""
@@ -61,28 +154,45 @@ class ConnectionManager:
         request_id = message.get("id")
 
         if request_id:
-            is_finished = payload.get("is_finished", "N/A")
-            Logger.debug(f"接收消息 {request_id} | 完成: {is_finished}")
+            Logger.debug("接收消息 %s | 完成: %s", request_id, payload.get("is_finished", "N/A"))
+
+        state = self.requests.get(request_id) if request_id else None
+        if state is None:
+            return
 
         # 检查是否为流式响应
-        if request_id in self.streaming_responses:
-            queue = self.streaming_responses[request_id]
+        queue = state.queue
+        if queue is not None:
             if payload.get("is_streaming"):
                 # 追踪包计数
-                if request_id not in self.streaming_chunk_count:
-                    self.streaming_chunk_count[request_id] = 0
-                self.streaming_chunk_count[request_id] += 1
-                chunk_num = self.streaming_chunk_count[request_id]
+                state.chunk_count += 1
+                chunk_num = state.chunk_count
 
                 if "chunk" in payload:
+                    # 处理消息的协程由该执行端的所有请求共享，不能等待单个 HTTP 消费者：
+                    # 积压超过上限时只取消这一个请求。已缓存的数据块保留给消费者，
+                    # 随后放入错误信号，使 HTTP 响应中止而不是被当作正常结束
+                    if queue.qsize() >= settings.WS_STREAM_MAX_QUEUE:
+                        Logger.warning("流式消费过慢，取消请求", request_id=request_id, client_id=state.client_id)
+                        state.queue = None  # 不再接收后续数据块，清理时也不再放入结束信号
+                        queue.put_nowait(
+                            HTTPException(
+                                status_code=status.HTTP_502_BAD_GATEWAY,
+                                detail="Streaming response buffer overflowed, request cancelled",
+                            )
+                        )
+                        await self.cancel_request(request_id)
+                        return
                     queue.put_nowait(payload["chunk"])
 
-                client_id = self.request_to_client.get(request_id, "unknown")
+                client_id = state.client_id
 
                 if payload.get("is_finished"):
-                    queue.put_nowait(None)
+                    queue.put_nowait(None)  # 预留的最后一个位置保证结束信号总能放入
                     # 记录最后一个包
                     Logger.ws_receive(request_id, client_id, is_stream_end=True, total_chunks=chunk_num, data=message)
+                    # 结束信号已入队，先解除队列引用，避免清理时丢弃尚未消费的数据
+                    state.queue = None
                     self._cleanup_request(request_id)  # 正常完成时清理
                 elif chunk_num == 1:
                     # 记录第一个包
@@ -93,11 +203,12 @@ class ConnectionManager:
             return
 
         # 处理非流式响应
-        if request_id and request_id in self.pending_responses:
+        future = state.future
+        if future is not None:
+            # 先解除引用，清理时不会把已设置结果的 Future 当作未完成请求取消
+            state.future = None
             # 记录非流式响应
-            client_id = self.request_to_client.get(request_id, "unknown")
-            Logger.ws_receive(request_id, client_id, data=message)
-            future = self.pending_responses.pop(request_id)
+            Logger.ws_receive(request_id, state.client_id, data=message)
             if message.get("status", {}).get("error"):
                 code = message["status"].get("code")
                 error_payload = message["status"].get("errorPayload")
@@ -105,21 +216,32 @@ class ConnectionManager:
                 future.set_exception(exception)
             else:
                 future.set_result(payload)
+            self._cleanup_request(request_id)  # 收到响应即完成，释放映射关系
 
     def get_next_client(self) -> str:
         """轮询算法，获取下一个健康的客户端ID"""
-        if not self._client_ids:
+        client_ids = self._client_ids
+        count = len(client_ids)
+        if count == 1:
+            # 最常见的单客户端部署，无需维护轮询索引
+            return client_ids[0]
+        if not count:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="No frontend clients connected",
             )
-        client_id = self._client_ids[self._next_client_index]
-        self._next_client_index = (self._next_client_index + 1) % len(self._client_ids)
+        # 客户端断开后快照可能变短，索引越界时从头开始
+        index = self._next_client_index
+        if index >= count:
+            index = 0
+        client_id = client_ids[index]
+        index += 1
+        self._next_client_index = 0 if index >= count else index
         return client_id
 
-    def get_all_clients(self) -> list[str]:
-        """获取所有连接的客户端ID列表"""
-        return list(self.active_connections.keys())
+    def get_all_clients(self) -> tuple[str, ...]:
+        """获取所有连接的客户端ID（连接/断开时维护的只读快照，无需每次复制）"""
+        return self._client_ids
 
     @asynccontextmanager
     async def monitored_proxy_request(self, request_id: str, request: Request):
@@ -128,21 +250,22 @@ class ConnectionManager:
         It handles request registration and cancellation/cleanup upon exit.
         """
         client_id = self.get_next_client()
-        self.request_to_client[request_id] = client_id
+        self.requests[request_id] = PendingRequest(client_id)
         self.client_active_requests[client_id].add(request_id)
-        Logger.debug(f"注册请求 {request_id} → {client_id}")
+        Logger.debug("注册请求 %s → %s", request_id, client_id)
 
         try:
             yield
         finally:
-            if await request.is_disconnected():
-                Logger.event("DISCONNECT", "客户端断开连接", request_id=request_id)
-                await self.cancel_request(request_id)
-            else:
-                # For non-streaming requests, the future is cleaned up when the response is received.
-                # For streaming, it's cleaned up when the stream ends.
-                # This is a fallback for unexpected exits.
-                if request_id in self.pending_responses or request_id in self.streaming_responses:
+            # Requests that completed normally were already cleaned up when the response
+            # (or the end of the stream) arrived; only then is the disconnect check skipped,
+            # since `is_disconnected()` has to poll the ASGI receive channel.
+            if request_id in self.requests:
+                if await request.is_disconnected():
+                    Logger.event("DISCONNECT", "客户端断开连接", request_id=request_id)
+                    await self.cancel_request(request_id)
+                else:
+                    # Fallback for unexpected exits (timeouts, errors, aborted streams).
                     self._cleanup_request(request_id)
 
     async def proxy_request(
@@ -158,38 +281,48 @@ class ConnectionManager:
         For streaming requests, it returns an async generator.
         The actual registration and cleanup are handled by the `monitored_proxy_request` context manager.
         """
-        client_id = self.request_to_client[request_id]
-        websocket = self.active_connections[client_id]
-
-        if isinstance(payload, BaseModel):
-            payload_to_send = payload.model_dump(by_alias=True, exclude_none=True)
-        else:
-            payload_to_send = payload or {}
+        state = self.requests[request_id]
+        client_id = state.client_id
+        writer = self.client_writers[client_id]
+        if writer.closed:
+            # 发送任务已因连接故障退出，立即失败，而不是等到超时
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Frontend client connection is closed",
+            )
 
-        command: dict[str, Any] = {
-            "id": request_id,
-            "type": command_type,
-            "payload": payload_to_send,
-        }
+        command = self._encode_command(request_id, command_type, payload)
 
         Logger.ws_send(request_id, client_id, command_type, command=command)
 
         if is_streaming:
-            return await self._handle_streaming_request(websocket, command, request_id, request)
+            return await self._handle_streaming_request(writer, command, state, request_id, request)
 
-        return await self._handle_non_streaming_request(websocket, command, request_id)
+        return await self._handle_non_streaming_request(writer, command, state, request_id)
+
+    @staticmethod
+    def _encode_command(request_id: str, command_type: str, payload: Any) -> str:
+        """
+        Encodes a command into the JSON text frame sent to the frontend.
+        Pydantic models anywhere in the payload are serialized straight to JSON by pydantic-core
+        and embedded as-is, skipping the intermediate dict and a second encoding pass.
+        """
+        return orjson.dumps(
+            {"id": request_id, "type": command_type, "payload": payload or {}}, default=_embed_model_json
+        ).decode()
 
     async def _handle_non_streaming_request(
-        self, websocket: WebSocket, command: dict[str, Any], request_id: str
+        self, writer: ClientWriter, command: str, state: PendingRequest, request_id: str
     ) -> Any:
         """Handles a non-streaming request."""
-        future = asyncio.get_running_loop().create_future()
-        self.pending_responses[request_id] = future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        state.future = future
+        # A plain timer fails the future on timeout, so no per-request `asyncio.wait_for` wrapper is needed.
+        timeout_handle = loop.call_later(settings.WEBSOCKET_TIMEOUT, self._expire_future, future)
         try:
-            await websocket.send_json(command)
-            response_payload = await asyncio.wait_for(
-                future, timeout=settings.WEBSOCKET_TIMEOUT
-            )
+            writer.send(command)
+            response_payload = await future
             # Cleanup is handled when the response is received in `handle_message`
             return response_payload
         except asyncio.TimeoutError:
@@ -207,21 +340,32 @@ class ConnectionManager:
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail=f"Error communicating with frontend client: {str(e)}",
             )
+        finally:
+            timeout_handle.cancel()
+
+    @staticmethod
+    def _expire_future(future: asyncio.Future):
+        """Timer callback: fails a still-pending future with a timeout."""
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
 
     async def _handle_streaming_request(
         self,
-        websocket: WebSocket,
-        command: dict[str, Any],
+        writer: ClientWriter,
+        command: str,
+        state: PendingRequest,
         request_id: str,
         request: Request,
     ) -> AsyncGenerator[Any, None]:
         """Handles a streaming request and returns an async generator."""
-        queue: asyncio.Queue = asyncio.Queue()
-        self.streaming_responses[request_id] = queue
+        # 数据块最多占用 WS_STREAM_MAX_QUEUE 个位置，额外预留一个位置给结束或错误信号。
+        # 生产端只用 put_nowait（积压达到上限即判定溢出），消费端仅在队列为空时才创建等待 Future
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_STREAM_MAX_QUEUE + 1)
+        state.queue = queue
 
         async def stream_generator() -> AsyncGenerator[Any, None]:
             try:
-                await websocket.send_json(command)
+                writer.send(command)
                 while True:
                     # Check for disconnect before waiting for the next item
                     if await request.is_disconnected():
@@ -230,14 +374,38 @@ class ConnectionManager:
                         break
 
                     try:
-                        item = await asyncio.wait_for(queue.get(), timeout=1.0)
-                    except asyncio.TimeoutError:
+                        # asyncio.timeout 只挂一个定时器，不像 wait_for 那样额外包装一层等待
+                        async with asyncio.timeout(1.0):
+                            item = await queue.get()
+                    except TimeoutError:
                         # Timeout allows us to re-check the disconnect status
                         continue
 
                     if item is None:  # End of stream signal
                         break
+                    if isinstance(item, Exception):  # 异常结束：中止响应
+                        raise item
+
+                    # 把已经到达的数据块合并为一次输出，突发时减少 ASGI 发送次数；
+                    # 数据块本身是上游字节流的任意切片，拼接不会改变响应内容
+                    finished = False
+                    error = None
+                    if not queue.empty():
+                        parts = [item]
+                        while not queue.empty():
+                            item = queue.get_nowait()
+                            if item is None or isinstance(item, Exception):
+                                finished = True
+                                error = item
+                                break
+                            parts.append(item)
+                        item = "".join(parts)
                     yield item
+                    if finished:
+                        # 先输出已收到的数据，再按信号正常结束或中止
+                        if error is not None:
+                            raise error
+                        break
             finally:
                 # The context manager will ultimately handle the final cleanup
                 pass
@@ -247,90 +415,83 @@ class ConnectionManager:
     async def cancel_request(self, request_id: str) -> bool:
         """
         取消指定的请求（唯一入口点）
-        
+
         职责：
-        1. 检查请求是否存在
+        1. 检查请求是否存在并清理后端资源
         2. 发送取消信号给前端
-        3. 清理后端资源
-        
+
         Args:
             request_id: 要取消的请求ID
-            
+
         Returns:
             bool: 取消操作是否成功启动
         """
-        Logger.debug(f"尝试取消请求 {request_id}")
+        Logger.debug("尝试取消请求 %s", request_id)
 
-        # 步骤 1：幂等性检查
-        if request_id not in self.request_to_client:
-            Logger.debug(f"请求 {request_id} 未找到或已取消")
+        client_id = self._cancel_local(request_id)
+        if client_id is None:
             return False
 
-        # 步骤 2：获取处理该请求的客户端
-        client_id = self.request_to_client[request_id]
+        self._send_cancel_signal(request_id, client_id)
+        return True
 
-        # 步骤 3：发送取消信号（best effort）
-        cancel_signal_sent = False
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            cancel_message = {
-                "type": "cancel_task",
-                "id": request_id
-            }
-            try:
-                await websocket.send_json(cancel_message)
-                Logger.event("CANCEL", "发送取消信号", request_id=request_id, client_id=client_id)
-                cancel_signal_sent = True
-            except Exception as e:
-                Logger.error("发送取消信号失败", exc=e, request_id=request_id, client_id=client_id)
-                # 即使发送失败，也要继续清理后端资源
-        else:
-            Logger.warning("客户端未连接，无法发送取消信号", client_id=client_id)
+    def _cancel_local(self, request_id: str) -> str | None:
+        """
+        同步清理请求的后端资源（内部方法）
 
-        # 步骤 4：清理后端资源（必须执行）
-        self._cleanup_request(request_id)
+        Args:
+            request_id: 要取消的请求ID
 
-        return True
+        Returns:
+            处理该请求的客户端ID，请求不存在或已取消时返回 None
+        """
+        # 幂等性检查
+        state = self._cleanup_request(request_id)
+        if state is None:
+            Logger.debug("请求 %s 未找到或已取消", request_id)
+            return None
+        return state.client_id
+
+    def _send_cancel_signal(self, request_id: str, client_id: str):
+        """向前端发送取消信号（best effort，由发送协程异步写出）"""
+        writer = self.client_writers.get(client_id)
+        if writer is None:
+            Logger.warning("客户端未连接，无法发送取消信号", client_id=client_id)
+            return
 
-    def _cleanup_request(self, request_id: str):
+        writer.send(f"{_CANCEL_FRAME_PREFIX}{orjson.dumps(request_id).decode()}}}")
+        Logger.event("CANCEL", "发送取消信号", request_id=request_id, client_id=client_id)
+
+    def _cleanup_request(self, request_id: str) -> PendingRequest | None:
         """
         清理与请求相关的所有内部资源（内部方法）
         
-        注意：此方法是幂等的，可以安全地多次调用
-        """
-        cleaned_items = []
-
-        # 清理 1：流式响应队列
-        if request_id in self.streaming_responses:
-            queue = self.streaming_responses.pop(request_id)
-            # 确保队列中的等待者被释放
-            try:
-                queue.put_nowait(None)
-            except asyncio.QueueFull:
-                pass
-            cleaned_items.append("queue")
-
-        # 清理 2：请求映射关系
-        if request_id in self.request_to_client:
-            client_id = self.request_to_client.pop(request_id)
-            if client_id in self.client_active_requests:
-                self.client_active_requests[client_id].discard(request_id)
-            cleaned_items.append("mapping")
-
-        # 清理 3：非流式响应的 Future
-        if request_id in self.pending_responses:
-            future = self.pending_responses.pop(request_id)
-            if not future.done():
-                future.cancel()
-            cleaned_items.append("future")
-
-        # 清理 4：流式包计数
-        if request_id in self.streaming_chunk_count:
-            self.streaming_chunk_count.pop(request_id)
-            cleaned_items.append("chunk_count")
-
-        if cleaned_items:
-            Logger.debug(f"清理资源 {request_id} | {', '.join(cleaned_items)}")
+        注意：此方法是幂等的，可以安全地多次调用。
+        请求状态只需一次 pop(request_id, None) 即可整体取出。
 
+        Returns:
+            被清理的请求状态，请求不存在或已清理时返回 None
+        """
+        state = self.requests.pop(request_id, None)
+        if state is None:
+            return None
+
+        # 流式响应队列：在已缓存的数据之后放入结束信号释放消费者（预留的位置保证能放入）
+        queue = state.queue
+        if queue is not None:
+            queue.put_nowait(None)
+
+        # 请求映射关系
+        client_requests = self.client_active_requests.get(state.client_id)
+        if client_requests is not None:
+            client_requests.discard(request_id)
+
+        # 非流式响应的 Future
+        future = state.future
+        if future is not None and not future.done():
+            future.cancel()
+
+        Logger.debug("清理资源 %s", request_id)
+        return state
 
 manager = ConnectionManager()
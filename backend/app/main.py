@@ -1,7 +1,8 @@
 import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
+import orjson
 from app.api import api_router
 from app.core import manager
 from app.core.config import settings
@@ -11,7 +12,7 @@ from app.core.log_utils import Logger, setup_logging
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
 # 配置日志系统
 setup_logging(settings.LOG_LEVEL)
@@ -25,6 +26,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     cleanup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await cleanup_task  # 等待任务真正结束，避免退出时遗留未完成的任务
     file_manager.cleanup_all_temp_files()
 
 
@@ -45,18 +48,21 @@ app.add_middleware(
 
 @app.exception_handler(ApiException)
 async def api_exception_handler(request: Request, exc: ApiException):
-    return JSONResponse(
+    return Response(
         status_code=exc.status_code,
-        content=exc.detail,
+        content=orjson.dumps(exc.detail),
+        media_type="application/json",
     )
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     Logger.error("请求验证失败", errors=str(exc.errors()))
-    return JSONResponse(
+    # errors() 的 ctx 中可能带有异常对象，无法直接序列化的值统一转为字符串
+    return Response(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=exc.errors(),
+        content=orjson.dumps(exc.errors(), default=str),
+        media_type="application/json",
     )
 
 
@@ -68,7 +74,7 @@ async def read_root():
     """根路径，提供一个简单的健康检查端点"""
     return {
         "status": "ok",
-        "connected_clients": list(manager.active_connections.keys()),
+        "connected_clients": manager.get_all_clients(),  # 连接/断开时维护的快照，无需每次复制
     }
 
 
@@ -78,13 +84,29 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     WebSocket 连接的主入口。
     """
     await manager.connect(websocket, client_id)
+    # 循环内频繁调用的方法提前绑定为局部变量，省去每条消息的属性查找
+    receive = websocket.receive
+    handle_message = manager.handle_message
+    loads = orjson.loads
     try:
         while True:
-            data = await websocket.receive_json()
-            await manager.handle_message(data)  # 统一由 handle_message 处理消息和日志
+            # 直接读取原始帧并用 orjson 解析，文本帧和二进制帧均可
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+            raw = message.get("text")
+            try:
+                data = loads(raw if raw is not None else message["bytes"])
+            except orjson.JSONDecodeError as e:
+                # 单条坏消息只记录并跳过，不断开整个执行端连接
+                Logger.warning("忽略无法解析的消息", client_id=client_id, error=str(e))
+                continue
+            # handle_message 不会挂起等待 HTTP 消费者，直接在接收循环中按顺序处理
+            await handle_message(data)  # 统一由 handle_message 处理消息和日志
 
     except WebSocketDisconnect:
-        await manager.disconnect(client_id)
+        pass
     except Exception as e:
         Logger.error("WebSocket 连接异常", exc=e, client_id=client_id)
-        await manager.disconnect(client_id)
+    finally:
+        await manager.disconnect(client_id, websocket)
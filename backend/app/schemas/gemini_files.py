@@ -1,13 +1,20 @@
 import re
+from functools import lru_cache
 from typing import Any
 
-DURATION_PATTERN = r"^\d+(\.\d{1,9})?s$"
+DURATION_PATTERN = re.compile(r"\d+(\.\d{1,9})?s")  # 预编译，配合 fullmatch 使用，无需 ^$ 锚点
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from .gemini_enums import Source, State
 
 
+@lru_cache(maxsize=256)
+def _is_valid_duration(value: str) -> bool:
+    """同一文件的元数据会被反复获取，时长字符串重复率很高，缓存正则匹配结果"""
+    return DURATION_PATTERN.fullmatch(value) is not None
+
+
 class Status(BaseModel):
     code: int = Field(description="The status code, which should be an enum value of `google.rpc.Code`.")
     message: str = Field(
@@ -40,7 +47,7 @@ class VideoFileMetadata(BaseModel):
 
     @field_validator("video_duration")
     def validate_video_duration(cls, v: str | None) -> str | None:
-        if v is not None and not re.match(DURATION_PATTERN, v):
+        if v is not None and not _is_valid_duration(v):
             raise ValueError("Invalid duration format")
         return v
 
@@ -77,15 +84,14 @@ class File(BaseModel):
     error: Status | None = Field(default=None, description="Output only. Error status if File processing failed.")
     video_metadata: VideoFileMetadata | None = Field(default=None, alias="videoMetadata", description="Output only. Metadata for a video.")
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)  # 只读响应结构
 
     @field_validator("size_bytes", mode="before")
     def validate_size_bytes(cls, v: str | int) -> str:
         if isinstance(v, int):
             return str(v)
-        try:
-            int(v)
-        except ValueError:
+        # 纯数字字符串判断，不走 int() 的异常路径
+        if not isinstance(v, str) or not v.isdecimal():
             raise ValueError(f"'size_bytes' must be a string representing a numeric file size in bytes, but got '{v}'")
         return v
 
@@ -131,4 +137,4 @@ class ListFilesResponse(BaseModel):
         default=None, alias="nextPageToken", description="A token that can be sent as a pageToken into a subsequent files.list call."
     )
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)  # 只读响应结构
@@ -714,4 +714,4 @@ class GenerateContentResponse(BaseModel):
     )
     response_id: str | None = Field(None, alias="responseId", description="Output only. responseId is used to identify each response.")
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)  # 只读响应结构
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict, Field
+import sys
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 SUPPORTED_GENERATION_METHODS = (
     "generateContent",
@@ -27,7 +29,18 @@ class Model(BaseModel):
     max_temperature: float | None = Field(None, alias="maxTemperature", description="The maximum temperature this model can use.")
     thinking: bool | None = Field(None, description="Whether the model supports thinking.")
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)  # 只读响应结构
+
+    @field_validator("supported_generation_methods")
+    def intern_generation_methods(cls, v: list[str] | None) -> list[str] | None:
+        # 取值只有少数几种，驻留后所有模型共享同一批字符串对象
+        if v is None:
+            return v
+        return [sys.intern(method) for method in v]
+
+    @field_validator("model_stage")
+    def intern_model_stage(cls, v: str | None) -> str | None:
+        return sys.intern(v) if v is not None else v
 
 
 class ListModelsResponse(BaseModel):
@@ -35,7 +48,7 @@ class ListModelsResponse(BaseModel):
     next_page_token: str | None = Field(
         None, alias="nextPageToken", description="A token, which can be sent as pageToken to retrieve the next page."
     )
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)  # 只读响应结构
 
 
 class ListModelsPayload(BaseModel):
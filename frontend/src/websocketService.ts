@@ -91,52 +91,68 @@ const connectInternal = () => {
     callbacks?.onError(event);
   };
 
-  ws.onmessage = async (event) => {
-    let command: Command | null = null;
+  ws.onmessage = (event) => {
+    let parsed: unknown;
     try {
-      const message = JSON.parse(event.data);
-      
-      // 新增：处理取消指令
-      if (message.type === 'cancel_task') {
-        const requestId = message.id;
-        callbacks?.onLog(`Received cancel request for: ${requestId}`);
-        
-        const cancelled = geminiExecutor.cancelExecution(requestId);
-        
-        if (cancelled) {
-          // Log line removed as per new logging strategy
-        } else {
-          callbacks?.onLog(`Request ${requestId} was not active or already completed`);
-        }
-        return;
-      }
-      
-      command = message as Command;
-      callbacks?.onLog(`Received command: ${command.type} (ID: ${command.id})`);
-
-      const sendResponse = (payload: unknown) => {
-        const response = { id: command?.id, payload };
-        ws?.send(JSON.stringify(response));
-      };
-
-      if (command.type === 'streamGenerateContent') {
-        await geminiExecutor.execute(command, sendResponse);
-        callbacks?.onLog(`Finished streaming for command ID: ${command.id}`);
-      } else {
-        const result = await geminiExecutor.execute(command, sendResponse);
-        const response: ResponsePayload = { id: command.id, payload: result, status: { error: false, code: 200 } };
-        ws?.send(JSON.stringify(response));
-        callbacks?.onLog(`Successfully executed command ID: ${command.id}`);
-      }
+      parsed = JSON.parse(event.data);
     } catch (error) {
-      const responseId = command?.id || 'unknown';
-      const response = createErrorResponse(error, responseId);
+      const response = createErrorResponse(error, 'unknown');
       ws?.send(JSON.stringify(response));
-      callbacks?.onLog(`Sent error response for command ID: ${responseId}`);
+      callbacks?.onLog('Sent error response for command ID: unknown');
+      return;
+    }
+
+    // The backend coalesces messages queued at the same moment into a single array frame.
+    const messages = Array.isArray(parsed) ? parsed : [parsed];
+    for (const message of messages) {
+      void handleMessage(message);
     }
   };
 };
 
+const handleMessage = async (message: any) => {
+  let command: Command | null = null;
+  try {
+    // 新增：处理取消指令
+    if (message.type === 'cancel_task') {
+      const requestId = message.id;
+      callbacks?.onLog(`Received cancel request for: ${requestId}`);
+
+      const cancelled = geminiExecutor.cancelExecution(requestId);
+
+      if (cancelled) {
+        // Log line removed as per new logging strategy
+      } else {
+        callbacks?.onLog(`Request ${requestId} was not active or already completed`);
+      }
+      return;
+    }
+
+    command = message as Command;
+    callbacks?.onLog(`Received command: ${command.type} (ID: ${command.id})`);
+
+    const sendResponse = (payload: unknown) => {
+      const response = { id: command?.id, payload };
+      ws?.send(JSON.stringify(response));
+    };
+
+    if (command.type === 'streamGenerateContent') {
+      await geminiExecutor.execute(command, sendResponse);
+      callbacks?.onLog(`Finished streaming for command ID: ${command.id}`);
+    } else {
+      const result = await geminiExecutor.execute(command, sendResponse);
+      const response: ResponsePayload = { id: command.id, payload: result, status: { error: false, code: 200 } };
+      ws?.send(JSON.stringify(response));
+      callbacks?.onLog(`Successfully executed command ID: ${command.id}`);
+    }
+  } catch (error) {
+    const responseId = command?.id || 'unknown';
+    const response = createErrorResponse(error, responseId);
+    ws?.send(JSON.stringify(response));
+    callbacks?.onLog(`Sent error response for command ID: ${responseId}`);
+  }
+};
+
 const connect = (url: string, id: string, cbs: ConnectionCallbacks) => {
   websocketUrl = url;
   clientId = id;